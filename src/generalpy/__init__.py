@@ -6,76 +6,193 @@ Library for general classes and methods.
 
 You can import classes and methods directly from this library, like `from generalpy import CustomLogging` 
 or from their specific modules like `from generalpy.custom_logging import CustomLogging`
-"""
-
-from .api import (
-    Api_Call
-)
 
-from .cli import (
-    Attrib,
-    ICACLS,
-    TaskList
-)
+- Items are imported lazily, i.e the submodule is imported only when an item is accessed for the first time.
+    - Submodules can be accessed lazily too, like `generalpy.general.format_bytes`
+    - Python 3.15+ : Using explicit lazy imports (`__lazy_modules__`, PEP 810)
+    - Older versions : Using `lazy_loader` (Set `EAGER_IMPORT=1` environment variable to import everything on `import generalpy`)
+"""
+import sys
 
-from .ctypes import (
-    run_ShellExecuteW,
-    running_as_admin,
-    set_app_user_model_id,
-)
 
-from .custom_logging import (
-    CustomLogging,
-    LevelFormatter,
-)
 
-from .database import (
-    DatabaseCollection,
-    Settings,
-)
 
-from .decorator import (
-    combine_single_items,
-    conditional,
-    log_it,
-    platform_specific,
-    retry_support,
-    run_threaded,
-)
+# {submoduleName: [itemName, ...], ...}
+_SUBMOD_ATTRS = {
+    'api': [
+        'Api_Call',
+    ],
+    'cli': [
+        'Attrib',
+        'ICACLS',
+        'TaskList',
+    ],
+    'ctypes': [
+        'run_ShellExecuteW',
+        'running_as_admin',
+        'set_app_user_model_id',
+    ],
+    'custom_logging': [
+        'CustomLogging',
+        'LevelFormatter',
+    ],
+    'database': [
+        'DatabaseCollection',
+        'Settings',
+    ],
+    'decorator': [
+        'combine_single_items',
+        'conditional',
+        'log_it',
+        'memoize',
+        'platform_specific',
+        'retry_support',
+        'run_threaded',
+        'shutdown_run_threaded',
+    ],
+    'exceptions': [
+        'IgnoreError',
+        'RetryCancelled',
+    ],
+    'files': [
+        'delete_files_by_condition',
+        'delete_files_by_prefix_suffix',
+        'get_new_path',
+        'get_random_file_path',
+        'get_unsupported_file_path_chars',
+        'read_file_chunks',
+        'sanitised_filename',
+    ],
+    'general': [
+        'first_capital',
+        'format_bytes',
+        'format_dict',
+        'generate_repr_str',
+        'get_adjusted_color',
+        'get_digit_from_text',
+        'get_first_non_alphabet',
+        'get_installed_fonts',
+        'is_python',
+        'punctuate',
+        'remove_extra_spaces',
+        'replace_html_tags',
+        'replace_multiple_chars',
+        'similarized',
+        'sliced_list',
+        'Calender_Class',
+    ],
+    'signal': [
+        'Signal',
+    ],
+}
 
-from .exceptions import (
-    IgnoreError
-)
 
-from .files import (
-    delete_files_by_condition,
-    delete_files_by_prefix_suffix,
-    get_new_path,
-    get_random_file_path,
-    get_unsupported_file_path_chars,
-    read_file_chunks,
-    sanitised_filename,
-)
 
-from .general import (
-    first_capital,
-    format_bytes,
-    format_dict,
-    generate_repr_str,
-    get_adjusted_color,
-    get_digit_from_text,
-    get_first_non_alphabet,
-    get_installed_fonts,
-    is_python,
-    punctuate,
-    remove_extra_spaces,
-    replace_html_tags,
-    replace_multiple_chars,
-    similarized,
-    sliced_list,
-    Calender_Class
-)
+if sys.version_info >= (3, 15):
+    __lazy_modules__ = [
+        'generalpy.api',
+        'generalpy.cli',
+        'generalpy.ctypes',
+        'generalpy.custom_logging',
+        'generalpy.database',
+        'generalpy.decorator',
+        'generalpy.exceptions',
+        'generalpy.files',
+        'generalpy.general',
+        'generalpy.signal',
+    ]
+    __all__ = [
+        name
+        for names in _SUBMOD_ATTRS.values()
+        for name in names
+    ] + sorted(_SUBMOD_ATTRS)
+    
+    def __getattr__(name: str):
+        """ Imports submodule `name` on first access, like `generalpy.general` (before any of its items is accessed) """
+        if name in _SUBMOD_ATTRS:
+            import importlib
+            return importlib.import_module(f'{__name__}.{name}')
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    
+    from .api import (
+        Api_Call,
+    )
+    
+    from .cli import (
+        Attrib,
+        ICACLS,
+        TaskList,
+    )
+    
+    from .ctypes import (
+        run_ShellExecuteW,
+        running_as_admin,
+        set_app_user_model_id,
+    )
+    
+    from .custom_logging import (
+        CustomLogging,
+        LevelFormatter,
+    )
+    
+    from .database import (
+        DatabaseCollection,
+        Settings,
+    )
+    
+    from .decorator import (
+        combine_single_items,
+        conditional,
+        log_it,
+        memoize,
+        platform_specific,
+        retry_support,
+        run_threaded,
+        shutdown_run_threaded,
+    )
+    
+    from .exceptions import (
+        IgnoreError,
+        RetryCancelled,
+    )
+    
+    from .files import (
+        delete_files_by_condition,
+        delete_files_by_prefix_suffix,
+        get_new_path,
+        get_random_file_path,
+        get_unsupported_file_path_chars,
+        read_file_chunks,
+        sanitised_filename,
+    )
+    
+    from .general import (
+        first_capital,
+        format_bytes,
+        format_dict,
+        generate_repr_str,
+        get_adjusted_color,
+        get_digit_from_text,
+        get_first_non_alphabet,
+        get_installed_fonts,
+        is_python,
+        punctuate,
+        remove_extra_spaces,
+        replace_html_tags,
+        replace_multiple_chars,
+        similarized,
+        sliced_list,
+        Calender_Class,
+    )
+    
+    from .signal import (
+        Signal,
+    )
 
-from .signal import (
-    Signal
-)
\ No newline at end of file
+else:
+    import lazy_loader
+    __getattr__, __dir__, __all__ = lazy_loader.attach(
+        __name__,
+        submodules=set(_SUBMOD_ATTRS),
+        submod_attrs=_SUBMOD_ATTRS
+    )
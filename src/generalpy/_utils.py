@@ -3,6 +3,7 @@ This module is private,
 It's not recommanded to use it directly.
 """
 import logging
+from functools import lru_cache
 
 """
 Items imported inside functions/classes
@@ -14,11 +15,14 @@ Items imported inside functions/classes
 
 
 
+@lru_cache(maxsize=1)
 def _get_basic_logger():
     """
     Returns `CustomLogging.logger`
+    - Created only once, and then same logger is returned on every call
     """
     from .custom_logging import CustomLogging
     return CustomLogging(
+        loggerName=__name__,                                                        # Private name: Not shared with `CustomLogging` of user
         loggingLevel=logging.DEBUG
     ).logger
\ No newline at end of file
@@ -2,13 +2,22 @@
 Module related to APIs and related functions
 """
 
+import asyncio
 import json
+from functools import cached_property
 from logging import Logger
+from urllib.parse import urlencode
 import requests
 
 from .general import format_dict
 from ._utils import _get_basic_logger
 
+# `aiohttp` module: imported on first async call (optional dependency)
+_aiohttp = None
+
+# Sentinel: Response is not fetched yet (`None` can be a JSON response)
+_NOT_FETCHED = object()
+
 
 
 
@@ -27,6 +36,9 @@ class Api_Call:
         Class to handle API calls.
         - Contains both sync and async functions
         - async functions requires you to install aiohttp
+        - Connections are reused (`requests.Session`). Use `close()` or `with Api_Call(...) as api:` to release them
+        - Async connections are reused too (`aiohttp.ClientSession`). Use `aclose()` or `async with Api_Call(...) as api:` to release them
+        - Response is fetched only once and then cached. Use `refresh()` to fetch it again on next access
 
         Args:
             baseUrl: The base URL for the API.
@@ -39,6 +51,27 @@ class Api_Call:
         self.__apiKeyValue = apiKeyValue
         self.__keyValuePairs = keyValuePairs
         self.__logger = logger or _get_basic_logger()
+        
+        # Data
+        self._session = requests.Session()                                          # Reused for keep-alive & connection pooling
+        self._aio_session = None                                                    # `aiohttp.ClientSession`: created on first async call
+        self.__apiUrl = self._build_api_url()
+        self._cached_sync_json = _NOT_FETCHED                                       # Cached JSON response of sync path
+        self._cached_json = _NOT_FETCHED                                            # Cached JSON response of async path
+        self._aio_loop: asyncio.AbstractEventLoop | None = None                     # Event loop of `_aio_session` & `_aio_lock`
+        self._aio_lock: asyncio.Lock | None = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        await self.aclose()
     
     @property
     def api_key(self):
@@ -48,30 +81,38 @@ class Api_Call:
     @property
     def apiUrl(self):
         """ URL endpoint to call the API """
-        endpoint = self.__baseUrl + '?'
-        if self.__keyValuePairs:
-            for key, value in self.__keyValuePairs.items():
-                if value is not None:
-                    endpoint += f'&{key}={value}'
-        if self.api_key:
-            endpoint += f'&{self.api_key[0]}={self.api_key[1]}'
-            
-        return endpoint
+        return self.__apiUrl
         
-    @property
+    @cached_property
     def apiResponse(self):
-        """ Response from the API """
-        response = requests.get(self.apiUrl)
+        """ Response from the API (cached, see `refresh()`) """
+        response = self._session.get(self.apiUrl)
         return response
     
     @property
     def apiResponseJson(self):
-        """ JSON format of response from API """
+        """ JSON format of response from API (cached, see `refresh()`) 
+        - If response can't be fetched/parsed: Invalid data dict is returned (not cached, fetched again on next access)
+        """
+        if self._cached_sync_json is not _NOT_FETCHED:
+            return self._cached_sync_json
         try:
-            return self.apiResponse.json()
+            self._cached_sync_json = self.apiResponse.json()
         except Exception as e:
             self.__logger.debug(e)
+            self.__dict__.pop('apiResponse', None)
             return self._return_invalid_data()
+        return self._cached_sync_json
+
+    def close(self):
+        """ Closes the underlying `requests.Session` (and its pooled connections) """
+        self._session.close()
+
+    def refresh(self):
+        """ Clears the cached response, so that it will be fetched again from the API on next access """
+        self.__dict__.pop('apiResponse', None)
+        self._cached_sync_json = _NOT_FETCHED
+        self._cached_json = _NOT_FETCHED
 
     def get_response_raw_str(self):
         """ Get str of properly formatted api response """
@@ -94,14 +135,26 @@ class Api_Call:
 
     
     ## ----------------------------------------- Async ----------------------------------------- ##
+    async def aclose(self):
+        """ (ASYNC) Closes the underlying `aiohttp.ClientSession` (if created) and the `requests.Session` """
+        self._bind_aio_loop()
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+        self.close()
+
     @property
     async def async_apiResponseJson(self):
-        """ (ASYNC) JSON format of response from API """
-        try:
-            return await self._async_get_response_json_from_url(self.apiUrl)
-        except Exception as e:
-            self.__logger.debug(e)
-            return await self._async_return_invalid_data()
+        """ (ASYNC) JSON format of response from API (cached, see `refresh()`) """
+        self._bind_aio_loop()
+        async with self._aio_lock:
+            if self._cached_json is _NOT_FETCHED:
+                try:
+                    self._cached_json = await self._async_get_response_json_from_url(self.apiUrl)
+                except Exception as e:
+                    self.__logger.debug(e)
+                    return await self._async_return_invalid_data()
+            return self._cached_json
 
     async def async_get_response_raw_str(self):
         """ (ASYNC) Get str of properly formatted API response """
@@ -120,6 +173,20 @@ class Api_Call:
 
 
     ## ----------------------------------------- Internals ----------------------------------------- ##
+    def _build_api_url(self):
+        """ Returns URL endpoint (with URL-encoded query parameters) to call the API """
+        params = {
+            key: value 
+            for key, value in self.__keyValuePairs.items() 
+            if value is not None
+        }
+        if self.__apiKeyValue and self.__apiKeyValue[1] is not None:
+            params[self.__apiKeyValue[0]] = self.__apiKeyValue[1]
+        
+        if not params:
+            return self.__baseUrl
+        return f'{self.__baseUrl}?{urlencode(params)}'
+
     def _return_invalid_data(self):
         """ Returns invalid data dict """
         return {
@@ -132,10 +199,35 @@ class Api_Call:
         """ Returns invalid data dict """
         return self._return_invalid_data()
 
-    @staticmethod
-    async def _async_get_response_json_from_url(url: str):
+    def _bind_aio_loop(self):
+        """ 
+        Binds async resources (`_aio_session` & `_aio_lock`) to the running event loop 
+        - If loop is changed (like a new `asyncio.run`), these are created again (those of old loop can't be used)
+        """
+        loop = asyncio.get_running_loop()
+        if self._aio_loop is not loop:
+            self._aio_loop = loop
+            self._aio_lock = asyncio.Lock()
+            self._aio_session = None                                                # Session of old loop: Can't be closed on this loop
+
+    async def _get_aio_session(self):
+        """ (ASYNC) Returns `aiohttp.ClientSession` of this instance (creates it, if not available) """
+        global _aiohttp
+        self._bind_aio_loop()
+        if self._aio_session is None or self._aio_session.closed:
+            if _aiohttp is None:
+                import aiohttp as _aiohttp
+            self._aio_session = _aiohttp.ClientSession(
+                connector=_aiohttp.TCPConnector(
+                    limit=32,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                )
+            )
+        return self._aio_session
+
+    async def _async_get_response_json_from_url(self, url: str):
         """ (ASYNC) Response JSON from the API """
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                return await response.json()
+        session = await self._get_aio_session()
+        async with session.get(url) as response:
+            return await response.json()
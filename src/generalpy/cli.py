@@ -4,11 +4,30 @@ This module contain classes and methods related to CLI (Command Line Interface)
 """
 import csv
 from logging import Logger
+import re
 import subprocess
+import threading
+import time
 from typing import Literal
 
 from ._utils import _get_basic_logger
+from .ctypes import _get_running_tasks_native
 from .decorator import platform_specific
+from .general import generate_repr_str
+
+
+# Permissions allowed to be set by `ICACLS`
+_ALLOWED_PERMS = frozenset(('N', 'F', 'M', 'RX', 'R', 'W', 'D'))
+
+# A line of `icacls` output (without path): `  account:permissions`
+_ICACLS_LINE = re.compile(r'^[ \t]*([^\s:][^:\n]*?):(\S[^\n]*?)[ \t]*$', re.M)
+
+# Process-wide snapshot of running tasks, shared by all `TaskList` instances: (time.monotonic(), tasks)
+_TASKS_CACHE: tuple[float, list[dict[str, str]]] | None = None
+_TASKS_CACHE_LOCK = threading.Lock()
+
+# Separator between tasks in `TaskList.get_formatted_str_representation`
+_TASKS_SEPARATOR = f" {'-'* 51}\n"
 
 
 
@@ -22,20 +41,19 @@ class Attrib:
     
     Args:
         - `path`: Path of the file/folder
+    
+    - Attributes are cached after `get()`/`set()`, so that `set()` doesn't need to run `attrib` twice.
+    Use `refresh_attrs()` if attributes were modified from somewhere else.
     """
+    
+    _ATTRS: tuple[str, ...] = ('A', 'H', 'I', 'R', 'S')
+    _ATTR_SET = frozenset(_ATTRS)
 
     def __init__(self, path:str) -> None:
         self.__path = path
-        self.__attrsType = {
-            'A':False,
-            'H':False,
-            'I':False,
-            'R':False,
-            'S':False
-        }
+        self._cached_attrs: dict[str, bool] | None = None
     
     def __repr__(self) -> str:
-        from .general import generate_repr_str
         return generate_repr_str(
             self, 'path'
         )
@@ -56,24 +74,49 @@ class Attrib:
         """ Set attributes to the file/folder of `path` """
         # Data
         newAttrs = []
-        currentAttrs = self.get()
-        for x, y in zip(
-            [a, h, i, r, s],
-            self.__attrsType
+        if self._cached_attrs is None:
+            self.get()
+        currentAttrs = self._cached_attrs
+        for name, want, have in zip(
+            self._ATTRS,
+            (a, h, i, r, s),
+            (currentAttrs[k] for k in self._ATTRS)
         ):                                                                          # Collect: if not already set
-            if x == True and not currentAttrs[y]:
-                newAttrs.append(f'+{y}')
-            elif x == False and currentAttrs[y]:
-                newAttrs.append(f'-{y}')
+            if want is not None and want != have:
+                newAttrs.append(('+' if want else '-') + name)
         
         # Set attributes
         if newAttrs:
+            changedAttrs = {i[1]: i[0] == '+' for i in newAttrs}
             newAttrs.insert(0,'attrib')
             newAttrs.append(self.__path)
-            return subprocess.run(
+            process = subprocess.run(
                 newAttrs, 
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
                 creationflags=subprocess.CREATE_NO_WINDOW
             )
+            
+            # Update cached attributes
+            if process.returncode == 0:
+                currentAttrs.update(changedAttrs)
+            else:
+                self.refresh_attrs()
+            return process
+
+    def set_many(self, *flags: str):
+        """ 
+        Set multiple attributes to the file/folder of `path`, in a single `attrib` call
+        - `flags`: Like `attrib` command, Ex: `set_many('+H', '+S', '-R')`
+        """
+        values: dict[str, bool] = {}
+        for flag in flags:
+            sign, name = flag[:1], flag[1:].upper()
+            if sign not in ('+', '-') or name not in self._ATTR_SET:
+                raise ValueError(f'Invalid attribute flag: {flag!r}')
+            values[name.lower()] = sign == '+'
+        return self.set(**values)
 
     def get(self):
         """ Returns: Attributes set to the `path` """
@@ -82,18 +125,22 @@ class Attrib:
             [
                 'attrib', self.__path
             ], 
-            universal_newlines=True, 
+            stderr=subprocess.DEVNULL,
             creationflags=subprocess.CREATE_NO_WINDOW
         )
-        currentAttribs = output[:9].replace(' ', '')
+        currentAttribs = self._ATTR_SET.intersection(
+            output[:9].decode('ascii', 'ignore')                                   # Only attributes column is decoded (not the path)
+        )
         
         # Parse the attribs
-        attribs = dict(self.__attrsType)
-        for i in currentAttribs:
-            if i in attribs:
-                attribs[i] = True
+        attribs = {i: i in currentAttribs for i in self._ATTRS}
+        self._cached_attrs = dict(attribs)
         return attribs
 
+    def refresh_attrs(self):
+        """ Clears the cached attributes, so that next `set()` will fetch them again """
+        self._cached_attrs = None
+
 
 
 
@@ -129,12 +176,8 @@ class ICACLS:
         self.__path = path
         self.__accountName = accountName
         self.__logger = logger or _get_basic_logger()
-        
-        # Data
-        self.__perms = ['N', 'F', 'M', 'RX', 'R', 'W', 'D']
     
     def __repr__(self) -> str:
-        from .general import generate_repr_str
         return generate_repr_str(
             self, 'path', 'accountName', 'logger'
         )
@@ -164,9 +207,9 @@ class ICACLS:
         perm: str | None = None
     ):
         """ Wrapper """
-        if perm in self.__perms or act in ['get', 'remove']:
+        if perm in _ALLOWED_PERMS or act in ('get', 'remove'):
             # Permissions to set
-            if act in ['get', 'remove']: 
+            if act in ('get', 'remove'): 
                 perm = None
             permToSet = f':(OI)(CI){perm}' if perm else ''
 
@@ -191,15 +234,17 @@ class ICACLS:
         else:
             self.__logger.info(f'Permission you want to set is not allowed ({perm})')
 
-    def denyPermissions(self, perm:str='F'):
-        """ Deny Permissions """ 
-        # Permission
-        permToCheck = '(N)' if perm=='F' else f'(DENY)({perm})'
-        
-        # Check if already set
-        for i, v  in self.getInfo().items():
-            if self.__accountName in i and permToCheck in v:
-                return
+    def denyPermissions(self, perm:str='F', check_first: bool = False):
+        """ Deny Permissions 
+        - `check_first`: If `True`, permissions won't be set if already denied (it runs `icacls` one more time)
+        """ 
+        # Check if already set (scan the raw output, instead of parsing it)
+        if check_first:
+            account = f'{self.__accountName}:'
+            permToCheck = '(N)' if perm=='F' else f'(DENY)({perm})'
+            for line in self.get_raw().removeprefix(self.__path).splitlines():
+                if account in line and permToCheck in line:
+                    return
         
         # If not running
         return self._subprocessWrapper(
@@ -210,30 +255,27 @@ class ICACLS:
         """ 
         Return the ACL information about `path` 
         """
-        output = self._subprocessWrapper('get')
+        output = self.get_raw()
         
         # Parsing output
         infoDict :dict[str, str] = {}
         if output:
-            # Remove useless items
-            output = output.removeprefix(self.__path)
-            output = output.replace('  ', '').strip()
-            
-            # Data structure
-            for p, i in enumerate(output.splitlines(), start=1):
-                try: 
-                    x, y = i.split(':')
-                except ValueError:
-                    pass
-                else:
-                    infoDict.update(
-                        {
-                            f'{p}- {x}': y
-                        }
-                    )
+            infoDict = {
+                f'{p}- {match.group(1)}': match.group(2)
+                for p, match in enumerate(
+                    _ICACLS_LINE.finditer(output.removeprefix(self.__path)), 
+                    start=1
+                )
+            }
         
         return infoDict
 
+    def get_raw(self) -> str:
+        """ 
+        Return the raw output of `icacls` for `path` (empty string on error)
+        """
+        return self._subprocessWrapper('get') or ''
+
     def grantPermissions(self, perm:str='F'):
         """ Grant Permissions """ 
         return self._subprocessWrapper(
@@ -253,63 +295,95 @@ class ICACLS:
 class TaskList:
     """
     Handles functions related to `tasklist` command of windows OS
+    - Data is fetched using native windows API (`NtQuerySystemInformation`), `tasklist` is used as a fallback
+    - Data is fetched only when it is accessed for the first time
+    - Use `refresh()` to get the latest data on next access
+    
+    Args:
+        - `cacheTTL`: Data fetched (by any instance) within last `cacheTTL` seconds is reused, instead of fetching it again. 
+        Use `0` to always fetch fresh data, or `TaskList.invalidate_cache()` to clear the shared data.
+        - `sort`: If `True`, tasks are sorted by their name (otherwise, they are in the order provided by windows)
     """
     
-    def __init__(self):
+    def __init__(self, cacheTTL: float = 0.5, sort: bool = False):
         # Args
-        self.__tasksStr: str = ''
-        self.__runningTasks: list[dict[str, str]] = []
-
-        # Populate the args
-        self._populate_tasks_str()
-        self._populate_running_tasks()
+        self.__cacheTTL = cacheTTL
+        self.__sort = sort
+        self.__runningTasks: list[dict[str, str]] | None = None                    # None: Not populated yet
+        self._by_exe: dict[str, list[dict[str, str]]] = {}                         # {exe.lower(): [task, ...], ...}
+        self._indexes: dict[str, dict[str | None, list[dict[str, str]]]] = {}       # {key: {value.lower(): [task, ...], ...}, ...}
     
     def __str__(self) -> str:
         return self.get_formatted_str_representation()
     
-    def _populate_running_tasks(self):
+    def _populate_if_needed(self):
         """
-        Populate `self.__runningTasks` after parsing data from `self.__tasksStr`, for all running tasks
+        Populate all data (natively, or by running `tasklist`), if not populated yet
         - Do not call this function directly
         """
-        # Get data
-        tasksList = self.__tasksStr.splitlines()
-        
-        # [Modify] Sorting tasksList & putting header on top
-        header = tasksList[0]
-        tasksList.remove(header)
-        tasksList = sorted(tasksList)
-        tasksList.insert(0, header)
+        global _TASKS_CACHE
+        if self.__runningTasks is None:
+            with _TASKS_CACHE_LOCK:                                                 # Lock: So that only one thread fetches the data at a time
+                if _TASKS_CACHE is not None and time.monotonic() - _TASKS_CACHE[0] < self.__cacheTTL:
+                    allTasks = _TASKS_CACHE[1]
+                else:
+                    try:
+                        allTasks = _get_running_tasks_native()
+                    except OSError:
+                        allTasks = list(self.iter_tasks())
+                    _TASKS_CACHE = (time.monotonic(), allTasks)
+            self._set_running_tasks(allTasks)
+    
+    def _set_running_tasks(self, allTasks: list[dict[str, str]]):
+        """
+        Sets `self.__runningTasks` (and `self._by_exe`) from `allTasks` (it is not modified, as it can be shared by other instances)
+        - Do not call this function directly
+        """
+        # [Modify] Sorting tasks by their name
+        if self.__sort:
+            self.__runningTasks = sorted(allTasks, key=lambda task: task['Image Name'].lower())
+        else:
+            self.__runningTasks = list(allTasks)
         
-        # Parsing data into a list[dict]
-        csvR = csv.DictReader(tasksList)
-        allTasks: list[dict[str, str]] = list(csvR)
-        self.__runningTasks = allTasks
+        # Index of tasks by their (lowercase) name
+        self._by_exe = {}
+        for task in self.__runningTasks:
+            self._by_exe.setdefault(task['Image Name'].lower(), []).append(task)
+        self._indexes = {'Image Name': self._by_exe}
     
-    def _populate_tasks_str(self):
+    def _get_index(self, key: str):
         """
-        Populate `self.__tasksStr` from the output of cmd.exe, for all running tasks
+        Returns index of tasks by their (lowercase) value of `key`: `{value.lower(): [task, ...], ...}`
+        - Index is created on first call for every `key`, and then reused
         - Do not call this function directly
         """
-        self.__tasksStr = subprocess.check_output(
-            'tasklist /fi "STATUS eq running" /fo "CSV"', 
-            universal_newlines=True,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).strip()
+        index = self._indexes.get(key)
+        if index is None:
+            index = {}
+            for task in self.__runningTasks:
+                value = task.get(key)
+                if value:
+                    value = value.lower()
+                index.setdefault(value, []).append(task)
+            self._indexes[key] = index
+        return index
     
     
     def get_formatted_str_representation(self):
         """
         Returns properly formatted representation of all running tasks
         """
-        tasks = f" {'-'* 51}\n"
+        self._populate_if_needed()
+        parts = [_TASKS_SEPARATOR]
         for task in self.__runningTasks:
-            for k, v in task.items():
-                tasks += f"|   {k:15} : {v:30}|\n"
-            tasks += f" {'-'* 51}\n"
-        return tasks
+            parts.extend(
+                f"|   {k:15} : {v:30}|\n" for k, v in task.items()
+            )
+            parts.append(_TASKS_SEPARATOR)
+        return ''.join(parts)
     
     def get_headers(self):
+        self._populate_if_needed()
         if not self.__runningTasks:
             return []
         task = self.__runningTasks[0]
@@ -320,24 +394,19 @@ class TaskList:
         Returns a list of all instances of running tasks, 
         based on the `key = taskValue`
         """
-        instances = []
-        for i in self.__runningTasks:
-            iValue = i.get(key)
-            if iValue:
-                iValue = iValue.lower()
-            if iValue == taskValue.lower():
-                instances.append(i)
-        return instances
+        self._populate_if_needed()
+        return list(
+            self._get_index(key).get(taskValue.lower(), [])
+        )
 
     def get_running_exes(self):
         """
         Returns a list of running executables
         """
-        runningExes: list[str] = []
-        for task in self.__runningTasks:
-            exe = task.get('Image Name', 'None')
-            runningExes.append(exe)
-        return runningExes
+        self._populate_if_needed()
+        return [
+            task['Image Name'] for task in self.__runningTasks
+        ]
     
     def get_running_tasks(self):
         """
@@ -345,15 +414,53 @@ class TaskList:
         with all available data like `Image Name`, `PID`, `Memory Usage` e.t.c
         - `[{...}, {...}, ...]`
         """
+        self._populate_if_needed()
         return self.__runningTasks
     
     def is_exe_running(self, exe: str):
         """
         Returns `True` if executable of name `exe` is currently running
         """
-        return exe.lower() in [
-            i.lower() for i in self.get_running_exes()
-        ]
-
-
-
+        self._populate_if_needed()
+        return exe.lower() in self._by_exe
+    
+    def refresh(self):
+        """
+        Clears all data, so that it will be fetched again on next access (subject to `cacheTTL`)
+        """
+        self.__runningTasks = None
+        self._by_exe = {}
+        self._indexes = {}
+    
+    @staticmethod
+    def invalidate_cache():
+        """
+        Clears the data shared by all instances, so that next access fetches fresh data
+        """
+        global _TASKS_CACHE
+        with _TASKS_CACHE_LOCK:
+            _TASKS_CACHE = None
+    
+    @staticmethod
+    def iter_tasks():
+        """
+        Yields all running tasks (as dict), parsed row-by-row from the output of `tasklist` while it runs
+        - Useful when only one match is needed, as `tasklist` is stopped when iteration is stopped, 
+        Ex: `any(task['Image Name'].lower() == 'chrome.exe' for task in TaskList.iter_tasks())`
+        - Data is not cached or shared (see `cacheTTL`)
+        - Raises `subprocess.CalledProcessError` if `tasklist` fails
+        """
+        with subprocess.Popen(
+            ['tasklist', '/fi', 'STATUS eq running', '/fo', 'CSV'],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        ) as process:
+            try:
+                # Header is consumed by DictReader
+                yield from csv.DictReader(process.stdout)
+            except GeneratorExit:
+                process.kill()                                                      # Not needed anymore
+                raise
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
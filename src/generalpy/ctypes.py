@@ -1,6 +1,7 @@
 """ This module contains ctypes related functions and classes """
 
 import ctypes
+import sys
 from logging import Logger
 
 from ._utils import _get_basic_logger
@@ -10,11 +11,150 @@ from ._utils import _get_basic_logger
 from .decorator import platform_specific
 
 
+# Windows API functions (resolved once, with explicit prototypes)
+if sys.platform == 'win32':
+    _IsUserAnAdmin = ctypes.windll.shell32.IsUserAnAdmin
+    _IsUserAnAdmin.argtypes = []
+    _IsUserAnAdmin.restype = ctypes.c_int
+    
+    _SetCurrentProcessExplicitAppUserModelID = ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID
+    _SetCurrentProcessExplicitAppUserModelID.argtypes = [ctypes.c_wchar_p]
+    _SetCurrentProcessExplicitAppUserModelID.restype = ctypes.c_long
+    
+    _ShellExecuteW = ctypes.windll.shell32.ShellExecuteW
+    _ShellExecuteW.argtypes = [
+        ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_wchar_p, 
+        ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_int
+    ]
+    _ShellExecuteW.restype = ctypes.c_ssize_t
+
+
+# Error messages of `ShellExecuteW`: {code: message, ...}
+_SHELLEXEC_ERRORS: dict[int, str] = {
+    0: "The operation failed.",
+    2: "The specified file was not found.",
+    3: "The specified path was not found.",
+    5: "Access is denied.",
+    8: "Not enough memory to complete the operation.",
+    11: "Invalid .exe file.",
+    26: "A sharing violation occurred.",
+    27: "The file name association is incomplete or invalid.",
+    28: "The DDE transaction timed out.",
+    29: "The DDE transaction failed.",
+    30: "Other DDE transactions were already in progress.",
+    31: "There is no application associated with the specified file extension.",
+    32: "The specified dynamic-link library (DLL) was not found."
+}
+
+
+
+
+
+
+
+
+
+
+class _UNICODE_STRING(ctypes.Structure):
+    """ `UNICODE_STRING` structure of windows API """
+    _fields_ = [
+        ('Length', ctypes.c_uint16),
+        ('MaximumLength', ctypes.c_uint16),
+        ('Buffer', ctypes.c_void_p),
+    ]
+
+
+class _SYSTEM_PROCESS_INFORMATION(ctypes.Structure):
+    """ `SYSTEM_PROCESS_INFORMATION` structure of windows API (only fields which are used) """
+    _fields_ = [
+        ('NextEntryOffset', ctypes.c_uint32),
+        ('NumberOfThreads', ctypes.c_uint32),
+        ('WorkingSetPrivateSize', ctypes.c_int64),
+        ('HardFaultCount', ctypes.c_uint32),
+        ('NumberOfThreadsHighWatermark', ctypes.c_uint32),
+        ('CycleTime', ctypes.c_uint64),
+        ('CreateTime', ctypes.c_int64),
+        ('UserTime', ctypes.c_int64),
+        ('KernelTime', ctypes.c_int64),
+        ('ImageName', _UNICODE_STRING),
+        ('BasePriority', ctypes.c_int32),
+        ('UniqueProcessId', ctypes.c_void_p),
+        ('InheritedFromUniqueProcessId', ctypes.c_void_p),
+        ('HandleCount', ctypes.c_uint32),
+        ('SessionId', ctypes.c_uint32),
+        ('UniqueProcessKey', ctypes.c_void_p),
+        ('PeakVirtualSize', ctypes.c_size_t),
+        ('VirtualSize', ctypes.c_size_t),
+        ('PageFaultCount', ctypes.c_uint32),
+        ('PeakWorkingSetSize', ctypes.c_size_t),
+        ('WorkingSetSize', ctypes.c_size_t),
+    ]
+
+
+
+def _get_session_name(sessionId: int) -> str:
+    """ Returns the name of windows session of `sessionId` (like `Console`, `Services`) """
+    wtsapi32 = ctypes.windll.wtsapi32
+    buffer = ctypes.c_wchar_p()
+    size = ctypes.c_uint32()
+    if not wtsapi32.WTSQuerySessionInformationW(
+        None, sessionId, 6,                                                         # 6: WTSWinStationName
+        ctypes.byref(buffer), ctypes.byref(size)
+    ):
+        return ''
+    try:
+        return buffer.value or ''
+    finally:
+        wtsapi32.WTSFreeMemory(buffer)
 
 
-
-
-
+@platform_specific('win32')
+def _get_running_tasks_native() -> list[dict[str, str]]:
+    """
+    Returns all running tasks using `NtQuerySystemInformation` windows API (without running `tasklist`)
+    - Data is returned in the same format as `tasklist /fo CSV`
+    - Raises `OSError` on error
+    """
+    # Get data (grow buffer until it fits)
+    size = 0x40000
+    returnLength = ctypes.c_uint32()
+    while True:
+        buffer = ctypes.create_string_buffer(size)
+        status = ctypes.windll.ntdll.NtQuerySystemInformation(
+            5, buffer, size, ctypes.byref(returnLength)                              # 5: SystemProcessInformation
+        ) & 0xFFFFFFFF
+        if status == 0xC0000004:                                                    # STATUS_INFO_LENGTH_MISMATCH
+            size = max(size * 2, returnLength.value + 0x10000)
+            continue
+        if status != 0:
+            raise OSError(f'NtQuerySystemInformation failed with status 0x{status:08X}')
+        break
+    
+    # Parse data
+    tasks: list[dict[str, str]] = []
+    sessionNames: dict[int, str] = {}
+    offset = 0
+    while True:
+        info = _SYSTEM_PROCESS_INFORMATION.from_buffer(buffer, offset)
+        if info.ImageName.Buffer:
+            imageName = ctypes.wstring_at(info.ImageName.Buffer, info.ImageName.Length // 2)
+        else:
+            imageName = 'System Idle Process'
+        if info.SessionId not in sessionNames:
+            sessionNames[info.SessionId] = _get_session_name(info.SessionId)
+        tasks.append(
+            {
+                'Image Name': imageName,
+                'PID': str(info.UniqueProcessId or 0),
+                'Session Name': sessionNames[info.SessionId],
+                'Session#': str(info.SessionId),
+                'Mem Usage': f'{info.WorkingSetSize // 1024:,} K',
+            }
+        )
+        if not info.NextEntryOffset:
+            break
+        offset += info.NextEntryOffset
+    return tasks
 
 
 
@@ -26,28 +166,12 @@ def run_ShellExecuteW(verb: str, command: str, file: str=None):
     - Ex: `_shell_execute_W('runas', sys.executable, __file__)`
     """
     # Execute the ShellExecuteW function
-    result = ctypes.windll.shell32.ShellExecuteW(None, verb, command, file, None, 1)
+    result = _ShellExecuteW(None, verb, command, file, None, 1)
     
     # Check the return value
     if result <= 32:
-        # Map error codes to error messages
-        error_messages = {
-            0: "The operation failed.",
-            2: "The specified file was not found.",
-            3: "The specified path was not found.",
-            5: "Access is denied.",
-            8: "Not enough memory to complete the operation.",
-            11: "Invalid .exe file.",
-            26: "A sharing violation occurred.",
-            27: "The file name association is incomplete or invalid.",
-            28: "The DDE transaction timed out.",
-            29: "The DDE transaction failed.",
-            30: "Other DDE transactions were already in progress.",
-            31: "There is no application associated with the specified file extension.",
-            32: "The specified dynamic-link library (DLL) was not found."
-        }
         # Get the error message corresponding to the result
-        error_message = error_messages.get(result, f"Unknown error (code {result})")
+        error_message = _SHELLEXEC_ERRORS.get(result, f"Unknown error (code {result})")
         
         # Raise an exception with the error message
         raise ValueError(f"ShellExecuteW failed: {error_message}")
@@ -57,11 +181,10 @@ def run_ShellExecuteW(verb: str, command: str, file: str=None):
 @platform_specific('win32')
 def running_as_admin(logger: Logger=None):
     """ Check if the current process is running with administrative privileges. """
-    logger = logger or _get_basic_logger()
-    
     try:
-        return ctypes.windll.shell32.IsUserAnAdmin() != 0
+        return _IsUserAnAdmin() != 0
     except Exception as e:
+        logger = logger or _get_basic_logger()
         logger.debug(f"Error checking admin privileges: {e}")
         return False
 
@@ -76,7 +199,6 @@ def set_app_user_model_id(appID: str):
     - used by Windows to group windows and taskbar items for a specific application, 
     as well as to launch and activate the application.
     """
-    ctypes.windll.shell32.\
-        SetCurrentProcessExplicitAppUserModelID(appID)
+    _SetCurrentProcessExplicitAppUserModelID(appID)
 
 
@@ -1,12 +1,19 @@
 """ 
 This module contains classes and methods related to logging
 """
-from bisect import bisect
+import atexit
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 import logging
-from logging.handlers import RotatingFileHandler
-
-from pytz import timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+import queue
+import sys
+import time
+import traceback
+from zoneinfo import ZoneInfo
 
 """
 Items imported inside functions/classes
@@ -15,6 +22,45 @@ Items imported inside functions/classes
 """
 
 
+# Prefix of format for each level: {levelno: prefix, ...}
+_LEVEL_PREFIXES = {
+    logging.DEBUG: '~   ',
+    logging.INFO: '>   ',
+    logging.WARNING: '[!] ',
+    logging.ERROR: '[x] ',
+}
+
+# Key of stream handler added by `CustomLogging` (file handlers are keyed by absolute path of file)
+_STREAM_HANDLER_KEY = '<stream>'
+
+# Single background thread for rotating backups of log files (thread is started on first rollover)
+_ROLLOVER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='generalpy-log-rollover')
+
+
+@lru_cache(maxsize=None)
+def _get_tzinfo(timeZone: str):
+    """ 
+    Returns `tzinfo` of `timeZone` (cached)
+    - Time zone data is taken from system, or from `tzdata` package (like on windows)
+    """
+    return ZoneInfo(timeZone)
+
+
+@lru_cache(maxsize=None)
+def _get_level_formatter(fmt: str, timeZone: str, datefmt: str | None = None):
+    """ 
+    Returns formatter for `fmt` (prefixed acc. to level), for all levels
+    - Single `fmt` is formatted, then prefix of level is prepended (instead of a formatter per level)
+    - Cached: Same formatter is shared by all loggers with same arguments
+    """
+    return _PrefixFormatter(
+        _LEVEL_PREFIXES,
+        fmt,
+        datefmt=datefmt,
+        timeZone=timeZone
+    )
+
+
 
 
 class CustomLogging:
@@ -22,13 +68,17 @@ class CustomLogging:
     Class to handle logging in easy way
     
     Args:
-    - `loggerName` : Name of the logger
+    - `loggerName` : Name of the logger (registered in `logging`, so `logging.getLogger(loggerName)` returns same logger)
+        - Stream/file handlers, which are already added by an instance with same name, are not added again
     - `loggingLevel` : level of logging like `logging.INFO`, logging.`ERROR` etc
     - `allLogsFilePath` : If passed, all `INFO` level logs would be saved to this file (with full format)
     - `errorLogsFilePath` : If passed, all `ERROR` level logs would be saved to this file (with full format)
     - `timeZone` : time zone to set for `%(asctime)s` in full format
     - `compactStreamLogs` : Handle if stream logs should be compact or in full format
     - `initialMsg` : Initial message to set as soon as the logger initiates for the first time
+    - `queueLogs` : If `True`, logs are formatted & written by a background thread (caller only puts the record in a queue)
+        - Pending logs are written on `close_logging_handlers` (or on exit)
+        - `raw_logging` is still written directly, so it might be written before the pending logs
     """
     
     compactFormat = f"%(module)-20s %(lineno)-4d : {' ' * 10} %(message)s"
@@ -42,7 +92,8 @@ class CustomLogging:
         errorLogsFilePath: str | None = None, 
         timeZone: str = 'Asia/Kolkata',
         compactStreamLogs: bool = True,
-        initialMsg: str = ''
+        initialMsg: str = '',
+        queueLogs: bool = False
     ):
         # Args
         self.__loggerName = loggerName if loggerName else __name__
@@ -52,23 +103,32 @@ class CustomLogging:
         self.__timeZone = timeZone
         self.__compactStreamLogs = compactStreamLogs
         self.__initialMsg = initialMsg
+        self.__queueLogs = queueLogs
         
         # Variables
         self.__logger = self._initiate_logger()                                                   # Logger
-        self.__handlers: set[logging.Handler] = set()                                             # List of all available handlers
+        self.__handlers: list[logging.Handler] = []                                               # List of all available handlers
+        self.__fileHandlers: dict[str, _SizeCountingFileHandler] = {}                             # {filePath: handler, ...}
+        self.__listener: QueueListener | None = None                                              # Listener of queued logs (if `queueLogs`)
         self.__compact_formatter = self._get_compact_formatter()
         self.__full_formatter = self._get_full_formatter()
         
-        # Logging
-        self._initiate_stream_logging()
-        if self.__allLogsFilePath:
-            self._initiate_file_logging(
-                self.__allLogsFilePath, logging.INFO
-            )
-        if self.__errorLogsFilePath:
-            self._initiate_file_logging(
-                self.__errorLogsFilePath, logging.ERROR
-            )
+        # Logging: Handlers already added to logger (by an instance with same name) are not added again
+        existingKeys = self._get_existing_handler_keys()
+        if _STREAM_HANDLER_KEY not in existingKeys:
+            self._initiate_stream_logging()
+        for filePath, level in (
+            (self.__allLogsFilePath, logging.INFO),
+            (self.__errorLogsFilePath, logging.ERROR)
+        ):
+            if filePath and os.path.abspath(filePath) not in existingKeys:
+                self._initiate_file_logging(
+                    filePath, level
+                )
+        if not self.__handlers:
+            return
+        if self.__queueLogs:
+            self._initiate_queue_logging()
         if self.__initialMsg:
             self.raw_logging(
                 self.__initialMsg, True, True
@@ -84,7 +144,8 @@ class CustomLogging:
             'errorLogsFilePath',
             'timeZone',
             'compactStreamLogs',
-            'initialMsg'
+            'initialMsg',
+            'queueLogs'
         )
 
 
@@ -109,6 +170,11 @@ class CustomLogging:
         """ Path of the file which contains all logs """
         return self.__allLogsFilePath
     
+    @property
+    def queueLogs(self):
+        """ Are logs written by a background thread """
+        return self.__queueLogs
+    
     @property
     def errorLogsFilePath(self):
         """ Path of the file which contains error logs """
@@ -118,58 +184,54 @@ class CustomLogging:
     ## ----------------------- Main functions ----------------------- ##
     def close_logging_handlers(self):
         """ Close all available handlers: All file handlers & stream handler """
-        for i in self.__handlers:
+        if self.__listener is not None:                                             # Write pending logs first
+            self.__listener.stop()
+            atexit.unregister(self.__listener.stop)
+            self.__listener = None
+        for i in reversed(self.__handlers):                                         # Reversed: File handlers before stream handler
+            self.__logger.removeHandler(i)
             i.close()
 
-    def raw_logging(self, msg:str, toAllLogsFile=False, toErrorLogsFile=False):
+    def raw_logging(self, msg:str, toAllLogsFile=False, toErrorLogsFile=False, level: int = logging.INFO):
         """ 
         Write Raw `msg` to appropriate logs (along with `terminal`) , without any formatting
         - toAllLogsFile : If `True`, `msg` would be logged to `allLogsFilePath` too (if setted in constructor) .
         - toAllLogs : If `True`, `msg` would be logged to `errorLogsFilePath` too (if setted in constructor) .
+        - level : Nothing is written, if `logger` is not enabled for this level (or is disabled)
         """
-        def write_to_file(filePath:str):
-            with open(filePath, 'a') as f:
-                f.write(
-                    f'{msg}\n'
-                )
-        
-        # Logging
-        print(msg)
+        if self.__logger.disabled or not self.__logger.isEnabledFor(level):
+            return
+        line = f'{msg}\n'
+        sys.stdout.write(line)                                                      # Single write (`print` writes `msg` & `\n` separately)
         if toAllLogsFile and self.__allLogsFilePath:
-            write_to_file(self.__allLogsFilePath)
+            self._write_to_file(self.__allLogsFilePath, line)
         if toErrorLogsFile and self.__errorLogsFilePath:
-            write_to_file(self.__errorLogsFilePath)
+            self._write_to_file(self.__errorLogsFilePath, line)
 
 
     ## ----------------------- Internals ----------------------- ##
-    def _add_handler(self, handler: logging.Handler):
-        """ Adds `handler` to `Logger` """
-        self.__logger.addHandler(handler)
-        self.__handlers.add(handler)
+    def _add_handler(self, handler: logging.Handler, key: str):
+        """ Adds `handler` to `Logger` (or to `QueueListener`, if `queueLogs`) 
+        - `key`: Identifies the handler (`_get_existing_handler_keys`)
+        """
+        handler._generalpyKeys = frozenset((key,))
+        if not self.__queueLogs:
+            self.__logger.addHandler(handler)
+        self.__handlers.append(handler)
     
     def _get_compact_formatter(self):
         """ Returns compact `Formatter` after initiating it for all levels """
-        return LevelFormatter(
-            {
-                logging.DEBUG: f'~   {self.compactFormat}',
-                logging.INFO: f'>   {self.compactFormat}',
-                logging.WARNING: f'[!] {self.compactFormat}',
-                logging.ERROR: f'[x] {self.compactFormat}',
-            },
-            timeZone=self.__timeZone
+        return _get_level_formatter(
+            self.compactFormat,
+            self.__timeZone
         )
 
     def _get_full_formatter(self):
         """ Returns full `Formatter` after initiating it for all levels """
-        return LevelFormatter(
-            {
-                logging.DEBUG: f'~   {self.fullFormat}',
-                logging.INFO: f'>   {self.fullFormat}',
-                logging.WARNING: f'[!] {self.fullFormat}',
-                logging.ERROR: f'[x] {self.fullFormat}',
-            },
-            datefmt=f"%Y-%m-%d %I:%M:%S %p ({self.__timeZone})",
-            timeZone=self.__timeZone
+        return _get_level_formatter(
+            self.fullFormat,
+            self.__timeZone,
+            datefmt=f"%Y-%m-%d %I:%M:%S %p ({self.__timeZone})"
         )
     
     def _initiate_file_logging(self, fileLocation:str, loggingLevel, formatter: logging.Formatter | None = None):
@@ -179,21 +241,53 @@ class CustomLogging:
         """
         if formatter is None:
             formatter = self.__full_formatter
-        fileHand = RotatingFileHandler(
+        fileHand = _SizeCountingFileHandler(
             fileLocation, 
             maxBytes=int(1024 * 1024),
             backupCount=1
         )
         fileHand.setFormatter(formatter)
         fileHand.setLevel(loggingLevel)
-        self._add_handler(fileHand)
+        self._add_handler(fileHand, fileHand.baseFilename)                         # Key: absolute path of file
+        self.__fileHandlers[fileLocation] = fileHand
+    
+    def _get_existing_handler_keys(self) -> set[str]:
+        """ Returns keys of handlers, which are already added to `Logger` by `CustomLogging` 
+        - Stream handler: `_STREAM_HANDLER_KEY`, File handler: absolute path of file
+        - Keys of `QueueHandler` are the keys of handlers of its listener
+        """
+        keys: set[str] = set()
+        for handler in self.__logger.handlers:
+            keys.update(getattr(handler, '_generalpyKeys', ()))
+        return keys
     
     def _initiate_logger(self):
-        """ Returns `Logger` after initiating it """
-        return logging.Logger(
-            self.__loggerName,
-            self.__loggingLevel
+        """ Returns `Logger` after initiating it 
+        - Registered logger is used: Reused if already exists
+        - Not propagated to parent loggers: Handlers are added to this logger itself
+        """
+        logger = logging.getLogger(self.__loggerName)
+        logger.setLevel(self.__loggingLevel)
+        logger.propagate = False
+        return logger
+    
+    def _initiate_queue_logging(self):
+        """ Initiates queued logging: `Logger` puts the records in a queue, `QueueListener` passes them to all handlers """
+        que = queue.SimpleQueue()
+        for fileHand in self.__fileHandlers.values():
+            fileHand.batchFlush = True                                              # Flushed by listener, when queue is empty
+        self.__listener = _BatchingQueueListener(
+            que, *self.__handlers, 
+            respect_handler_level=True
+        )
+        self.__listener.start()
+        atexit.register(self.__listener.stop)                                       # Listener thread is daemon: Write pending logs on exit
+        queueHand = QueueHandler(que)
+        queueHand._generalpyKeys = frozenset().union(
+            *(hand._generalpyKeys for hand in self.__handlers)
         )
+        self.__logger.addHandler(queueHand)
+        self.__handlers.insert(0, queueHand)                                        # First: Closed after file & stream handlers
     
     def _initiate_stream_logging(self):
         """ Initiates logs streaming to Terminal
@@ -203,7 +297,23 @@ class CustomLogging:
         streamHand.setFormatter(
             self.__compact_formatter if self.__compactStreamLogs else self.__full_formatter
         )
-        self._add_handler(streamHand)
+        self._add_handler(streamHand, _STREAM_HANDLER_KEY)
+    
+    def _write_to_file(self, filePath: str, text: str):
+        """ Writes `text` to file at `filePath`
+        - Reuses the already opened (buffered) stream of its file handler (if not closed)
+        - Not flushed here: flushed with the next log record of handler, or on close
+        """
+        handler = self.__fileHandlers.get(filePath)
+        if handler is None or handler.stream is None:
+            with open(filePath, 'a') as f:
+                f.write(text)
+            return
+        handler.acquire()
+        try:
+            handler.stream.write(text)
+        finally:
+            handler.release()
 
 
 
@@ -227,15 +337,15 @@ class LevelFormatter(logging.Formatter):
         # Function
         if 'fmt' in self.__kwargs:
             raise ValueError('Keyword argument "fmt" deprecated, use "formats"')
-        self.set_time_zone(self.__timeZone)
-        self.__formatters = sorted(
-            (
-                levelno,
-                logging.Formatter(
-                    fmt, **self.__kwargs
-                )
-            ) for levelno, fmt in self.__formats.items()
-        )
+        self.__levels = sorted(self.__formats)                                      # Sorted levelnos: for `bisect`
+        self.__formatters = [
+            _TimeZoneFormatter(
+                self.__formats[levelno], timeZone=self.__timeZone, **self.__kwargs
+            ) for levelno in self.__levels
+        ]
+        self.__levelMap: dict[int, logging.Formatter] = {}                        # {levelno: formatter, ...}
+        for levelno in (logging.NOTSET, logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL):
+            self._get_level_formatter(levelno)
     
     def __repr__(self) -> str:
         from .general import generate_repr_str
@@ -248,20 +358,200 @@ class LevelFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         """ Sets formatting """
-        idx = bisect(
-            a=self.__formatters,
-            x=(record.levelno,),                                                   # Comma: To make it a tuple, instead of int
-            hi=len(self.__formatters) - 1
-        )
-        levelno, formatter = self.__formatters[idx]
+        formatter = self.__levelMap.get(record.levelno)
+        if formatter is None:
+            formatter = self._get_level_formatter(record.levelno)
         return formatter.format(
             record
         )
 
-    @staticmethod
-    def set_time_zone(timeZone):
-        """ Sets the timezone """
-        logging.Formatter.converter = lambda *args: datetime.now(
-            tz=timezone(timeZone)
-        ).timetuple()
+    def _get_level_formatter(self, levelno: int) -> logging.Formatter:
+        """ 
+        Returns formatter for `levelno`: formatter of same or next higher level (or of highest level)
+        - Result is stored in `self.__levelMap` for direct lookup in `format`
+        """
+        idx = bisect_left(
+            a=self.__levels,
+            x=levelno,
+            hi=len(self.__levels) - 1
+        )
+        formatter = self.__formatters[idx]
+        self.__levelMap[levelno] = formatter
+        return formatter
+
+    def set_time_zone(self, timeZone: str):
+        """ 
+        Sets the timezone for `%(asctime)s` of this formatter 
+        - Only this formatter is affected (not `logging.Formatter` globally)
+        """
+        self.__timeZone = timeZone
+        for formatter in self.__formatters:
+            formatter.set_time_zone(timeZone)
+
+
+
+
+
+
+class _TimeZoneFormatter(logging.Formatter):
+    """ `Formatter` class which formats `%(asctime)s` in `timeZone` 
+    - Formatted time is cached for the current second, so it is re-formatted only once per second
+    """
+    
+    def __init__(self, *args, timeZone: str = 'Asia/Kolkata', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_time_zone(timeZone)
+    
+    def set_time_zone(self, timeZone: str):
+        """ Sets the timezone (and clears the cached time) """
+        self.__tz = _get_tzinfo(timeZone)
+        self.__lastTime: tuple[int, str] = (-1, '')                                # (second, formatted time)
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        """ Returns `record.created` formatted in timezone (cached for same second) """
+        second = int(record.created)
+        lastSecond, timeStr = self.__lastTime
+        if second != lastSecond:
+            timeStr = datetime.fromtimestamp(second, tz=self.__tz).strftime(
+                datefmt or self.default_time_format
+            )
+            self.__lastTime = (second, timeStr)                                     # Single assignment: thread safe
+        if datefmt:
+            return timeStr
+        return self.default_msec_format % (timeStr, record.msecs)
+
+
+
+
+
+
+class _PrefixFormatter(_TimeZoneFormatter):
+    """ `Formatter` class which prepends a prefix to the formatted record, based on its level 
+    - `prefixes` (dict) : `{levelno: prefix, ...}`
+    - Prefix of same or next higher level (or of highest level) is used, like `LevelFormatter`
+    """
+    
+    def __init__(self, prefixes: dict[int, str], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__levels = sorted(prefixes)                                            # Sorted levelnos: for `bisect`
+        self.__prefixes = [prefixes[levelno] for levelno in self.__levels]
+        self.__levelMap: dict[int, str] = {}                                        # {levelno: prefix, ...}
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """ Sets formatting """
+        prefix = self.__levelMap.get(record.levelno)
+        if prefix is None:
+            prefix = self._get_level_prefix(record.levelno)
+        return prefix + super().format(record)
+    
+    def _get_level_prefix(self, levelno: int) -> str:
+        """ Returns prefix for `levelno` (stored in `self.__levelMap` for direct lookup in `format`) """
+        idx = bisect_left(
+            a=self.__levels,
+            x=levelno,
+            hi=len(self.__levels) - 1
+        )
+        prefix = self.__prefixes[idx]
+        self.__levelMap[levelno] = prefix
+        return prefix
+
+
+
+
+
+
+class _SizeCountingFileHandler(RotatingFileHandler):
+    """ `RotatingFileHandler` which keeps track of size of file by counting the formatted records 
+    - Default `shouldRollover` checks file (`stat`, `seek` & `tell`) & formats the record twice, on every record
+    - Size is taken from file only when it is opened (i.e., after rollover too), then characters of records are added to it
+    - Rollover happens before the record, once size reaches `maxBytes`
+    - On rollover, only current file is renamed (fast), backups are rotated in background (`_ROLLOVER_EXECUTOR`, errors are reported like `handleError`)
+    - `batchFlush`: If `True`, stream is not flushed after every record, but on `flush_batch` (or on close)
+    """
+    
+    batchFlush = False
+    
+    def flush(self):
+        if not self.batchFlush:
+            super().flush()
+    
+    def flush_batch(self):
+        """ Flushes the stream (written records are passed to OS in one write) """
+        super().flush()
+    
+    def _open(self):
+        stream = super()._open()
+        self.__size = stream.seek(0, 2)                                             # Seek to end: returns size
+        return stream
+    
+    def format(self, record: logging.LogRecord) -> str:
+        msg = super().format(record)
+        self.__size += len(msg) + len(self.terminator)
+        return msg
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:                                                     # Delayed/closed: opens it (to get size)
+            self.stream = self._open()
+        if 0 < self.maxBytes <= self.__size:
+            if os.path.isfile(self.baseFilename):
+                return True
+            self.__size = 0                                                         # Not a regular file (like `/dev/null`): Never rolled over
+        return False
+    
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0 and os.path.exists(self.baseFilename):
+            pending = f'{self.baseFilename}.{time.time_ns()}.pending'               # Unique: Previous rollover might still be pending
+            os.replace(self.baseFilename, pending)
+            _ROLLOVER_EXECUTOR.submit(self._rotate_backups, pending).add_done_callback(
+                self._report_rotation_error
+            )
+        if not self.delay:
+            self.stream = self._open()
+    
+    def _rotate_backups(self, pendingFile: str):
+        """ Rotates backups (`.1` -> `.2` ...) & moves `pendingFile` to `.1` (runs in background) """
+        for i in range(self.backupCount - 1, 0, -1):
+            src = self.rotation_filename(f'{self.baseFilename}.{i}')
+            if os.path.exists(src):
+                os.replace(src, self.rotation_filename(f'{self.baseFilename}.{i + 1}'))
+        dst = self.rotation_filename(f'{self.baseFilename}.1')
+        if os.path.exists(dst):
+            os.remove(dst)
+        self.rotate(pendingFile, dst)
+    
+    def _report_rotation_error(self, future: Future):
+        """ Reports error of `_rotate_backups` (if any) to `stderr`, like `handleError` (i.e only if `logging.raiseExceptions`) """
+        if future.cancelled() or not logging.raiseExceptions:
+            return
+        error = future.exception()
+        if error is None:
+            return
+        try:
+            sys.stderr.write('--- Logging error ---\n')
+            traceback.print_exception(error, file=sys.stderr)
+            sys.stderr.write(f'Rotating backups of {self.baseFilename} failed\n')
+        except OSError:                                                             # `stderr` is not available
+            pass
+
+
+
+
+
+
+class _BatchingQueueListener(QueueListener):
+    """ `QueueListener` which flushes the batched file handlers (`flush_batch`) only when queue gets empty 
+    - So records which were queued together are written to file in a single write
+    """
+    
+    def dequeue(self, block: bool):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                if isinstance(handler, _SizeCountingFileHandler):
+                    handler.flush_batch()
+            return self.queue.get(block)
 
@@ -1,9 +1,14 @@
 """
 This module contain classes and methods related to database/settings handling
 """
+import atexit
 import json
+import mmap
 import os
 from pathlib import Path
+import stat
+import threading
+from types import MappingProxyType
 from typing import Any, Callable, TypeVar, overload
 
 """
@@ -11,12 +16,48 @@ Items imported inside functions/classes
 - from .general import generate_repr_str
 """
 
+try:
+    import orjson                                                                   # Optional dependency: faster JSON (de)serialization
+except ImportError:
+    orjson = None
+try:
+    import ssrjson                                                                  # Optional dependency: faster (SIMD) JSON parsing
+except ImportError:
+    ssrjson = None
+
+# Parses JSON from `str`/`bytes`: `ssrjson` or `orjson` (if installed), otherwise `json`
+_JSON_LOADS: Callable[[str | bytes], Any] = (
+    ssrjson.loads if ssrjson is not None
+    else orjson.loads if orjson is not None
+    else json.loads
+)
+
+# Parses JSON from a buffer (`memoryview`): only `orjson` supports it (if it is being used)
+_JSON_LOADS_BUFFER: Callable[[memoryview], Any] | None = orjson.loads if orjson is not None and _JSON_LOADS is orjson.loads else None
+
+# Minimum size (bytes) of settings file, to parse it from memory-mapped file (instead of reading it in memory)
+_MMAP_MIN_SIZE = 64 * 1024
+
 
 
 
 #-todo: getters and setters
 type_of_result = TypeVar('type_of_result')
 
+# Empty (read-only) data of a missing dataID: shared, instead of a new dict on every lookup
+_EMPTY_ID_DATA: MappingProxyType[str, Any] = MappingProxyType({})
+
+# Sentinel for missing values (where `None` can be a value)
+_MISSING = object()
+
+# Types whose values can't be modified in place (same object means same value)
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _noop(*args, **kwargs):
+    """ Does nothing: Default callback of `DatabaseCollection` (calling it is skipped) """
+    return None
+
 
 
 
@@ -33,6 +74,8 @@ class DatabaseCollection:
         - `_delete_dataType_fctn(dataID, dataType)`              : It will run (in last), when `delete_data_of_dataType` is called.
         - `_update_dataID_fctn(dataID, dataValue)`               : It will run (in last), when `update_data_of_dataID` is called.
         - `_update_dataType_fctn(dataID, dataType, dataValue)`   : It will run (in last), when `update_data_of_dataType` is called.
+        - `copyInitialData`                 : If `False`, `initialData` dict itself is used as collection-data (no copy), 
+                                              so changes in collection would reflect in `initialData` (and vice versa)
     
     Structure of `collection-data` (`dict[str, dict[str, Any]]`) :
     ```python
@@ -56,14 +99,15 @@ class DatabaseCollection:
         self,
         collectionName: str,
         initialData: dict[str, dict[str, Any]] | None = None,
-        _delete_dataID_fctn:     Callable[[str], Any] =                  lambda *args, **kwargs: None,
-        _delete_dataType_fctn:   Callable[[str, str], Any] =             lambda *args, **kwargs: None,
-        _update_dataID_fctn:     Callable[[str, dict[str, Any]], Any] =  lambda *args, **kwargs: None,
-        _update_dataType_fctn:   Callable[[str, str, Any], Any] =        lambda *args, **kwargs: None,
+        _delete_dataID_fctn:     Callable[[str], Any] =                  _noop,
+        _delete_dataType_fctn:   Callable[[str, str], Any] =             _noop,
+        _update_dataID_fctn:     Callable[[str, dict[str, Any]], Any] =  _noop,
+        _update_dataType_fctn:   Callable[[str, str, Any], Any] =        _noop,
+        copyInitialData: bool = True
     ):
         # Args
         self.collectionName = collectionName
-        self.initialData = initialData if initialData else {}
+        self.initialData = initialData if initialData is not None else {}
         self._delete_dataID_fctn = _delete_dataID_fctn
         self._delete_dataType_fctn = _delete_dataType_fctn
         self._update_dataID_fctn = _update_dataID_fctn
@@ -71,7 +115,7 @@ class DatabaseCollection:
 
         # Data in collection
         # {dataID : {dataType: dataValue, ...}, ... }
-        self.__collectionData: dict[str, dict[str, Any]] = dict(self.initialData)
+        self.__collectionData: dict[str, dict[str, Any]] = dict(self.initialData) if copyInitialData else self.initialData
     
     def __repr__(self):
         from .general import generate_repr_str
@@ -113,6 +157,15 @@ class DatabaseCollection:
         """
         return self._get_collectionData()
     
+    def get_all_data_readonly(self):
+        """
+        Returns all data from the collection of database
+        - as read-only view (no copy): It reflects the later changes in collection
+        - Shallow: dataIDs can't be added/removed/replaced through it, but data of a dataID (`view[dataID]`) is the live dict, 
+        so modifying it changes the collection directly (without running the callbacks)
+        """
+        return MappingProxyType(self._get_collectionData())
+    
     def get_all_data_as_json(self, indent=4, sort=True):
         """
         Returns all data from the collection of database
@@ -165,8 +218,7 @@ class DatabaseCollection:
         """
         dataID = str(dataID)
         dataType = str(dataType)
-        idData = self.get_data_of_dataID(dataID)
-        result = idData.get(dataType, default)
+        result = self.get_all_data().get(dataID, _EMPTY_ID_DATA).get(dataType, default)   # Direct: `dataID` is already `str`
         
         if not suppressError:
             if default is not None:
@@ -195,11 +247,11 @@ class DatabaseCollection:
         newDataID = str(newDataID)
         
         # Data of old dataID
-        idData = self.get_data_of_dataID(oldDataID)
+        idData = self.get_all_data().get(oldDataID, {})
         
         # Copying data to new dataID
         self.update_data_of_dataID(
-            newDataID, dict(idData)
+            newDataID, idData.copy()
         )
         
         # Deleting old dataID
@@ -213,7 +265,8 @@ class DatabaseCollection:
         dataID = str(dataID)
         if dataID in self.get_all_data():
             self._pop_from_collectionData(dataID)
-            self._delete_dataID_fctn(dataID)
+            if self._delete_dataID_fctn is not _noop:
+                self._delete_dataID_fctn(dataID)
     
     def delete_data_of_dataType(
         self,
@@ -222,24 +275,22 @@ class DatabaseCollection:
     ):
         """
         Deletes the `dataType` and its data from `dataID` of collection
+        - Only `_delete_dataType_fctn` runs (for each deleted dataType), not `_update_dataID_fctn`
         """
         # Modify
         dataID = str(dataID)
-        dataTypes = tuple(str(i) for i in dataTypes)
+        dataTypes = tuple(map(str, dataTypes))
 
-        # Delete dataType from dataID of collection
-        idData = self.get_data_of_dataID(dataID)
+        # Delete dataType from dataID of collection (in place: no need to update dataID)
+        idData = self.get_all_data().get(dataID)
+        if idData is None:
+            return
+        callback = self._delete_dataType_fctn
         for dataType in dataTypes:
-            if dataType in idData:
-                idData.pop(dataType)
-                self._delete_dataType_fctn(
+            if idData.pop(dataType, _MISSING) is not _MISSING and callback is not _noop:
+                callback(
                     dataID, dataType
                 )
-        
-        # Update the new data of dataID
-        self.update_data_of_dataID(
-            dataID, idData
-        )
 
     def update_data_of_dataID(
         self,
@@ -251,7 +302,8 @@ class DatabaseCollection:
         """
         dataID = str(dataID)
         self._update_collectionData(dataID, dataValue)
-        self._update_dataID_fctn(dataID, dataValue)
+        if self._update_dataID_fctn is not _noop:
+            self._update_dataID_fctn(dataID, dataValue)
 
     def update_data_of_dataType(
         self,
@@ -266,19 +318,17 @@ class DatabaseCollection:
         dataID = str(dataID)
         dataType = str(dataType)
         
-        # Data of dataID (Get -> Update)
-        idData = self.get_data_of_dataID(dataID)
-        idData.update(
-            {dataType: dataValue}
-        )
-        self._update_dataType_fctn(
-            dataID, dataType, dataValue
-        )
+        # Data of dataID (Updated in place: Added to collection, if not present)
+        idData = self.get_all_data().get(dataID)
+        if idData is None:
+            idData = {}
+            self._update_collectionData(dataID, idData)
+        idData[dataType] = dataValue
         
-        # Update data of collection
-        self.update_data_of_dataID(
-            dataID, idData
-        )
+        if self._update_dataType_fctn is not _noop:
+            self._update_dataType_fctn(
+                dataID, dataType, dataValue
+            )
 
 
 
@@ -293,6 +343,8 @@ class Settings:
         - `settings_file_name`: Name of the settings-file
         - `hard_fetch`: If `True`, Fetches settings from settings-file on every `get`, `update` and `__init__` method,
             otherwise settings will be loaded from settings-file only on `__init__` of this class.
+        - `save_delay`: If > 0, `update` saves settings-file after these seconds (in background), 
+            so updates done within this time are saved in single write. Use `flush` to save them immediately.
     
     [Handling] If some settings are missing in settings-file:
         - Settings-file will be updated with missing data on: 
@@ -310,22 +362,28 @@ class Settings:
         default_settings: dict[str, Any], 
         settings_directory: str | None = None,
         settings_file_name: str = 'settings.json',
-        hard_fetch: bool = False
+        hard_fetch: bool = False,
+        save_delay: float = 0
     ):
         # Args
         self.default_settings = default_settings
         self.settings_directory = settings_directory if settings_directory else os.getcwd()
         self.settings_file_name = settings_file_name
         self.hard_fetch = hard_fetch                                                 # for hard-fetching settings from file (see docstring)
+        self.save_delay = save_delay                                                 # for delayed saving of updates (see docstring)
         
         # Init
         self.settings_file_path = self._get_settings_file_path()                     # path of settings file
+        self._file_stamp: tuple[int, int, int] | None = None                         # stamp of settings file, when it was last loaded/saved
         self._settings = self._load_settings()                                       # all settings
+        self._dirty = False                                                          # Are updated settings pending to be saved
+        self._flush_lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
 
     def __repr__(self) -> str:
         from .general import generate_repr_str
         return generate_repr_str(
-            self, 'default_settings', 'settings_directory', 'settings_file_name', 'hard_fetch'
+            self, 'default_settings', 'settings_directory', 'settings_file_name', 'hard_fetch', 'save_delay'
         )
     
     def __str__(self) -> str:
@@ -333,10 +391,22 @@ class Settings:
         if not self._settings:
             return 'No settings available'
         
-        text = 'Current settings:\n'
-        for k, v in self._settings.items():
-            text += f'• {k:20} : {v}\n'
-        return text.strip()
+        lines = ['Current settings:']
+        lines.extend(
+            f'• {k:20} : {v}' for k, v in self._settings.items()
+        )
+        return '\n'.join(lines).strip()
+
+    def _get_file_stamp(self) -> tuple[int, int, int] | None:
+        """
+        Returns stamp of settings file: `(modification-time, size, inode)` (`None`, if file not present)
+        - Changed stamp means file was modified (or replaced)
+        """
+        try:
+            stat = os.stat(self.settings_file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
 
     def _get_settings_file_path(self) -> str:
         """
@@ -358,18 +428,30 @@ class Settings:
             return dict(self.default_settings)
 
         # [Load] settings from file
-        with open(self.settings_file_path, 'r') as f:
-            try:
-                settings = json.load(f)
-                # [Check] if all default settings are present in file
-                for key in self.default_settings:
-                    if key not in settings:
-                        settings[key] = self.default_settings[key]
-                        self._save_settings(settings)
-                return settings
-            except json.decoder.JSONDecodeError:
-                self._save_settings(self.default_settings)
-                return dict(self.default_settings)
+        self._file_stamp = self._get_file_stamp()
+        try:
+            settings = self._read_settings_file()
+        except ValueError:                                                          # Invalid JSON (`JSONDecodeError` of any JSON module) or encoding
+            self._save_settings(self.default_settings)
+            return dict(self.default_settings)
+        
+        # [Check] if all default settings are present in file: saved once, if any missing
+        merged = {**self.default_settings, **settings}                              # Values of file override the defaults
+        if len(merged) != len(settings):
+            self._save_settings(merged)
+        return merged
+
+    def _read_settings_file(self) -> Any:
+        """ 
+        Returns parsed JSON of settings file (raises `ValueError`, if invalid)
+        - Large file is parsed directly from memory-mapped file (without reading a copy of it), if supported by JSON parser
+        """
+        with open(self.settings_file_path, 'rb') as f:
+            if _JSON_LOADS_BUFFER is not None and os.fstat(f.fileno()).st_size >= _MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    return _JSON_LOADS_BUFFER(view)
+            data = f.read()
+        return _JSON_LOADS(data)
 
     @staticmethod
     def _reload_settings(func: Callable):
@@ -379,7 +461,9 @@ class Settings:
         """
         def wrapper(self, *args, **kwargs):
             if self.hard_fetch:
-                self._settings = self._load_settings()
+                self.flush()                                                         # Pending updates: before re-loading
+                if self._file_stamp is None or self._get_file_stamp() != self._file_stamp:   # Re-load only if file was changed
+                    self._settings = self._load_settings()
             return func(self, *args, **kwargs)
         return wrapper
 
@@ -387,18 +471,44 @@ class Settings:
         """ 
         Save the `setting` dict to settings file
         - Create file if not present
+        - Atomic: Written to a temporary file, which then replaces the settings file (never partially written)
+        - Permissions of settings file are kept (new file: default permissions acc. to umask)
+        - If settings file is a symlink: Its target file is replaced (symlink is kept)
         """
-        path = Path(self.settings_file_path)
+        path = Path(self.settings_file_path).resolve()
         path.parent.mkdir(
             parents=True,
             exist_ok=True
         )
-        with open(self.settings_file_path, 'w') as f:
-            json.dump(
-                settings, f,
-                indent=4,
-                sort_keys=True
-            )
+        data = json.dumps(                                                          # Always `json`: Same file content, whichever JSON library is installed
+            settings,
+            indent=4,
+            sort_keys=True
+        ).encode()
+        tempPath = path.with_name(f'{path.name}.{os.urandom(6).hex()}.tmp')
+        fd = os.open(                                                               # Mode `0o666`: umask is applied by OS (like `open`)
+            tempPath,
+            os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0),
+            0o666
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            self._copy_file_mode(path, tempPath)
+            os.replace(tempPath, path)
+        except BaseException:
+            os.remove(tempPath)
+            raise
+        self._file_stamp = self._get_file_stamp()
+
+    @staticmethod
+    def _copy_file_mode(srcPath: Path, dstPath: Path):
+        """ Sets permission bits of file at `srcPath` to file at `dstPath` (if `srcPath` is present) """
+        try:
+            mode = stat.S_IMODE(os.stat(srcPath).st_mode)
+        except FileNotFoundError:
+            return
+        os.chmod(dstPath, mode)
 
     @_reload_settings
     def get_setting(self, key: str, default: Any | None = None):
@@ -427,6 +537,38 @@ class Settings:
     def update_setting(self, key: str, value: Any) -> None:
         """ 
         Updates the setting `key` = `value` in settings file 
+        - Not saved if value is unchanged (same type & equal; for mutable values, not the same object which may have been modified in place)
         """
-        self._settings[key] = value
-        self._save_settings(self._settings)
+        current = self._settings.get(key, _MISSING)
+        if (
+            type(current) is type(value) and current == value 
+            and (current is not value or isinstance(value, _IMMUTABLE_TYPES))
+        ):
+            return
+        if self.save_delay <= 0:
+            self._settings[key] = value
+            self._save_settings(self._settings)
+            return
+        with self._flush_lock:
+            self._settings[key] = value
+            if not self._dirty:
+                atexit.register(self.flush)                                         # Save pending updates on exit (unregistered on flush)
+                self._dirty = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(self.save_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self):
+        """ 
+        Saves the pending updates (see `save_delay`) to settings file 
+        """
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self._save_settings(self._settings)
+                self._dirty = False
+                atexit.unregister(self.flush)                                       # Not kept alive till exit, if nothing is pending
@@ -1,15 +1,150 @@
 """ 
 This module contains decorators 
+
+- Set `GENERALPY_DECORATORS=off` environment variable (before importing this module) to make `log_it` & `retry_support` 
+no-op (no logging/retries in production code): `log_it` returns the decorated function as it is, 
+`retry_support` returns it as it is (`async`) or a thin wrapper which only carries `cancel_event` (`sync`)
 """
 import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
+import os
+import queue
+import random
 import sys
 import threading
 import time
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Callable, Any
 
 from ._utils import _get_basic_logger
+from .exceptions import RetryCancelled
+
+
+# `log_it` & `retry_support` are no-op, if disabled by environment variable (see module docstring)
+_DECORATORS_DISABLED = os.environ.get('GENERALPY_DECORATORS', '').lower() == 'off'
+
+
+def _with_unused_cancel_event(func):
+    """ 
+    Returns `func` (`retry_support`, if disabled) with `cancel_event` attribute, like the decorated `sync` methods 
+    - `sync`: Thin wrapper is returned (`func` itself is not modified), `async`: `func` is returned as it is
+    """
+    if asyncio.iscoroutinefunction(func):
+        return func
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    wrapper.cancel_event = threading.Event()                                        # Unused: No retries
+    return wrapper
+
+
+# Shared thread pool of `run_threaded` for non-daemon functions (created on first use)
+# - Unbounded: New thread is started only if no thread is idle (so functions never wait for each other)
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor():
+    """ Returns shared `ThreadPoolExecutor` of `run_threaded` (creates it, if not available) """
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=sys.maxsize,
+                thread_name_prefix='run_threaded'
+            )
+        return _EXECUTOR
+
+
+def _run_with_thread_name(name: str, func: Callable[[], Any]):
+    """ Runs `func` with current thread renamed to `name` (restored afterwards) """
+    thread = threading.current_thread()
+    originalName = thread.name
+    thread.name = name
+    try:
+        return func()
+    finally:
+        thread.name = originalName
+
+
+class _DaemonThreadPool:
+    """ 
+    Pool of daemon threads of `run_threaded` for daemon functions (so they never block the exit)
+    - Idle threads are reused: New thread is started only if no thread is idle (so functions never wait for each other)
+    - Idle thread exits after `idleTimeout` seconds
+    """
+    
+    def __init__(self, idleTimeout: float = 60):
+        self.__idleTimeout = idleTimeout
+        self.__tasks: queue.SimpleQueue[tuple[str, Callable[[], Any], Future]] = queue.SimpleQueue()
+        self.__idle = 0                                                             # Number of idle threads (not reserved for a submitted task)
+        self.__lock = threading.Lock()
+    
+    def submit(self, name: str, func: Callable[[], Any]) -> Future:
+        """ Runs `func` in a daemon thread named `name` & returns its `Future` """
+        future = Future()
+        self.__tasks.put((name, func, future))
+        with self.__lock:
+            if self.__idle:
+                self.__idle -= 1                                                    # Reserved: that idle thread would run it
+                return future
+        threading.Thread(target=self._worker, daemon=True).start()
+        return future
+    
+    def _worker(self):
+        """ Runs the submitted tasks (in a daemon thread) """
+        while True:
+            try:
+                name, func, future = self.__tasks.get(timeout=self.__idleTimeout)
+            except queue.Empty:
+                with self.__lock:
+                    if self.__idle:                                                 # Not reserved: exit
+                        self.__idle -= 1
+                        return
+                continue                                                            # Reserved: its task is being submitted
+            
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(_run_with_thread_name(name, func))
+                except BaseException as e:
+                    future.set_exception(e)
+            del func, future                                                        # Don't keep references, while idle
+            with self.__lock:
+                self.__idle += 1
+
+
+# Shared pool of `run_threaded` for daemon functions (threads are started on first use)
+_DAEMON_POOL = _DaemonThreadPool()
+
+
+def _freeze_arg(arg: Any):
+    """ Returns hashable version of `arg` (`list`, `tuple`, `set`, `dict` are converted recursively) """
+    if isinstance(arg, (list, tuple)):
+        return type(arg), tuple(_freeze_arg(i) for i in arg)
+    if isinstance(arg, (set, frozenset)):
+        return type(arg), frozenset(arg)
+    if isinstance(arg, dict):
+        return dict, tuple((k, _freeze_arg(v)) for k, v in arg.items())
+    return arg
+
+
+class _FrozenArgs:
+    """ Holds call arguments of `memoize` decorated function, hashed by their frozen version """
+    __slots__ = ('args', 'kwargs', 'key', 'hash')
+
+    def __init__(self, args: tuple, kwargs: dict):
+        self.args = args
+        self.kwargs = kwargs
+        self.key = _freeze_arg(args), _freeze_arg(kwargs)
+        self.hash = hash(self.key)
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        return isinstance(other, _FrozenArgs) and self.key == other.key
 
 
 
@@ -52,19 +187,18 @@ def conditional(condition: bool, defaultValue: Any = None):
     Decorator to run the decorated function and return it's value, only when `condition=True`
     - Otherwise, `defaultValue` would be returned without running the decorated function
     - Supports both `sync` and `async` methods
+    - `condition` is checked once, on decoration: If `True`, decorated function is returned as it is (no overhead on calls)
     """
     def top_level_wrapper(func):
+        if condition:
+            return func
         
         @wraps(func)
         def wrapper_sync(*args, **kwargs):
-            if condition:
-                return func(*args, **kwargs)
             return defaultValue
         
         @wraps(func)
         async def wrapper_async(*args, **kwargs):
-            if condition:
-                return await func(*args, **kwargs)
             return defaultValue
         
         if asyncio.iscoroutinefunction(func):
@@ -81,19 +215,30 @@ def log_it(logger: logging.Logger | None = None):
     Decorator to log when the decorated function runs and what it returns
     
     - `logger`: for logging purposes (if not provided, default logger will be used)
+    - No-op if `GENERALPY_DECORATORS=off` (see module docstring)
     """
+    if _DECORATORS_DISABLED:
+        return lambda func: func
     
     logger = logger or _get_basic_logger()
+    perf_counter_ns = time.perf_counter_ns                                          # Local: No attribute lookup on every call
     
     def top_level_wrapper(func):
         def wrapper(*args, **kwargs):
+            # Logging disabled: Only function (no timing & formatting)
+            if not logger.isEnabledFor(logging.INFO):
+                return func(*args, **kwargs)
+            
             # Function
-            t1 = time.perf_counter()
+            t1 = perf_counter_ns()
             retVal = func(*args, **kwargs)
-            t2 = time.perf_counter()
+            t2 = perf_counter_ns()
 
             # Log
-            logger.info(f'[LOG_IT] "{func.__name__}" ran and returned "{retVal}" [Time taken: {t2 - t1} seconds]')
+            logger.info(
+                '[LOG_IT] "%s" ran and returned "%s" [Time taken: %s seconds]', 
+                func.__name__, retVal, (t2 - t1) / 1e9
+            )
 
             return retVal
         return wrapper
@@ -101,23 +246,55 @@ def log_it(logger: logging.Logger | None = None):
 
 
 
+def memoize(maxsize: int | None = 128, typed: bool = False, freezeArgs: bool = False):
+    """ 
+    Decorator to cache the return values of decorated function, based on its arguments (using `functools.lru_cache`)
+    - Use it only for `sync` functions, whose return value depends only on their arguments
+    - `cache_info`, `cache_clear` & `__wrapped__` attributes are available on the decorated function
+
+    Args:
+    - `maxsize`: Maximum number of cached calls (`None` for unlimited)
+    - `typed`: If arguments of different types should be cached separately (like `3` and `3.0`). Not used with `freezeArgs`
+    - `freezeArgs`: Support unhashable arguments (`list`, `set`, `dict`), by hashing their frozen versions. 
+    Decorated function still gets the original arguments (of first call with equal arguments).
+    """
+    def top_level_wrapper(func):
+        if asyncio.iscoroutinefunction(func):
+            raise ValueError(f'[memoize decorator] Async function ({func.__name__}) is not supported')
+        if not freezeArgs:
+            return lru_cache(maxsize=maxsize, typed=typed)(func)
+        
+        @lru_cache(maxsize=maxsize)
+        def cached(frozenArgs: _FrozenArgs):
+            return func(*frozenArgs.args, **frozenArgs.kwargs)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached(_FrozenArgs(args, kwargs))
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return top_level_wrapper
+
+
+
 def platform_specific(*supportedPlatforms: str):
     """
     Decorator to run decorated function only if current platform is one of the `supportedPlatforms`
+    - Platform is checked once, on decoration: 
+        - Supported: decorated function is returned as it is (no overhead on calls)
+        - Not supported: a function is returned, which raises `RuntimeError` when called
     """
-    def check_platform():
-        if sys.platform not in supportedPlatforms:
-            spfs = ', '.join(supportedPlatforms) if supportedPlatforms else 'None'
-            raise Exception(
-                f"This function is only supported on: {spfs}. "
-                f"Your platform ({sys.platform}) is not supported."
-            )
-    
     def top_level_wrapper(func):
+        if sys.platform in supportedPlatforms:
+            return func
+        
+        spfs = ', '.join(supportedPlatforms) if supportedPlatforms else 'None'
+        msg = f"This function is only supported on: {spfs}. Your platform ({sys.platform}) is not supported."
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            check_platform()
-            return func(*args, **kwargs)
+            raise RuntimeError(msg)
         return wrapper
     return top_level_wrapper
 
@@ -129,7 +306,8 @@ def retry_support(
     onFailure: Callable[[Exception], Any] | None = None,
     retryWait: float = 1,
     exponentialTime: bool = False,
-    ignore: tuple[type[Exception], ...] | None = None
+    ignore: tuple[type[Exception], ...] | None = None,
+    jitter: float = 0
 ):
     """
     Decorator to retry the decorated function `num` times.
@@ -148,29 +326,44 @@ def retry_support(
     - `retryWait` (float): Time to wait between retries in seconds.
     - `exponentialTime` (bool): If True, retry time will increase exponentially with each attempt.
     - `ignore` (tuple[type[Exception], ...] | None): Exceptions to ignore and not trigger retries.
+    - `jitter` (float): Randomly varies each retry time by this fraction (between `0` & `1`, like `0.5` for ±50%), so that parallel retries don't hit at same time.
+
+    Cancelling (`sync` methods):
+    - Decorated function has `cancel_event` attribute (`threading.Event`)
+    - Set it (`func.cancel_event.set()`) to stop waiting for next retry, `RetryCancelled` is raised then (clear it to enable retries again)
+    - `async` methods can be cancelled as usual, i.e via `Task.cancel()`
 
     NOTE: This decorator can handle both `sync` and `async` methods, but both the decorated method and the 'onFailure' method should be of the same type.
+    NOTE: No-op if `GENERALPY_DECORATORS=off` (see module docstring). `cancel_event` is still available on `sync` methods (has no effect, as there are no retries)
     """
+    if not 0 <= jitter <= 1:
+        raise ValueError(f'[retry_support decorator] jitter should be between 0 and 1, not {jitter}')
+    if _DECORATORS_DISABLED:
+        return _with_unused_cancel_event
     logger = logger or _get_basic_logger()
     ignore = ignore or tuple()
 
     def top_lvl_wrapper(func):
 
         # Checks
+        isAsync = asyncio.iscoroutinefunction(func)
         if onFailure is not None:
-            if asyncio.iscoroutinefunction(func) != asyncio.iscoroutinefunction(onFailure):
+            if isAsync != asyncio.iscoroutinefunction(onFailure):
                 raise ValueError(f'[retry_support decorator] Both decorated function and onFailure function should be of same type, either sync or async')
 
         def _retry_on_failure(e: Exception):
+            # Logging: %-style (formatted only if logged)
             if onFailure is None:
-                logger.debug(f'[Retry - limit reached] {func.__name__}. Re-raising Error: ({type(e).__name__}) {e}')
+                logger.debug('[Retry - limit reached] %s. Re-raising Error: (%s) %s', func.__name__, type(e).__name__, e)
                 logger.exception(e)
                 raise
-            logger.debug(f'[Retry - limit reached] {func.__name__}. Running "{onFailure}" function for Error: ({type(e).__name__}) {e}')
+            logger.debug('[Retry - limit reached] %s. Running "%s" function for Error: (%s) %s', func.__name__, onFailure, type(e).__name__, e)
         
         def _retry_time(retrialNum: int, e: Exception):
-            logger.error(f'[Retry - {retrialNum}] {func.__name__}. Error: ({type(e).__name__}) {e}')
+            logger.error('[Retry - %s] %s. Error: (%s) %s', retrialNum, func.__name__, type(e).__name__, e)
             sleepTime = (retryWait * (2 ** retrialNum)) if exponentialTime else retryWait
+            if jitter:
+                return sleepTime * (1 + jitter * (2 * random.random() - 1))
             return sleepTime
 
         @wraps(func)
@@ -180,7 +373,7 @@ def retry_support(
                 try:
                     rv = await func(*args, **kwargs)
                 except Exception as e:
-                    if isinstance(e, ignore):
+                    if ignore and isinstance(e, ignore):
                         raise
                     if _retries >= num:
                         _retry_on_failure(e)
@@ -191,6 +384,8 @@ def retry_support(
                 else:
                     return rv
 
+        cancelEvent = threading.Event()
+
         @wraps(func)
         def wrapper_sync(*args, **kwargs):
             _retries = 0
@@ -198,21 +393,23 @@ def retry_support(
                 try:
                     rv = func(*args, **kwargs)
                 except Exception as e:
-                    if isinstance(e, ignore):
+                    if ignore and isinstance(e, ignore):
                         raise
                     if _retries >= num:
                         _retry_on_failure(e)
                         onFailure(e)
                         return
-                    time.sleep(_retry_time(_retries, e))
+                    if cancelEvent.wait(_retry_time(_retries, e)):
+                        raise RetryCancelled(f'[retry_support decorator] Retries of {func.__name__} are cancelled') from e
                     _retries += 1
                 else:
                     return rv
 
         # Return the appropriate wrapper based on whether the function is asynchronous
-        if asyncio.iscoroutinefunction(func):
+        if isAsync:
             return wrapper_async
         else:
+            wrapper_sync.cancel_event = cancelEvent
             return wrapper_sync
 
     return top_lvl_wrapper
@@ -228,6 +425,8 @@ def run_threaded(
     Decorator to run the decorated function in a new thread 
     - Use `__wrapped__` attribute to run the main function without running a thread
     - This decorator can handle both `sync` and `async` methods, BUT remember async functions would be started using `asyncio.create_task` and NOT run in a different thread
+    - Threads are reused: Non-daemon functions run in a shared thread pool, daemon functions in a shared pool of daemon threads (so they never block the exit)
+    - Returns `concurrent.futures.Future` of the function run (for `sync` methods)
 
     Args:
     - `daemon`: If thread should be daemon or not
@@ -242,12 +441,15 @@ def run_threaded(
         def wrapper_sync(*args, **kwargs):
             def main_function():
                 try:
-                    func(*args, **kwargs)
+                    return func(*args, **kwargs)
                 except Exception as e:
                     logger.debug(f'Error occured in {func.__name__} threaded function: {e}')
                     logger.exception(e)
                     raise
-            threading.Thread(target=main_function, name=name or func.__name__, daemon=daemon).start()
+            threadName = name or func.__name__
+            if daemon:
+                return _DAEMON_POOL.submit(threadName, main_function)
+            return _get_executor().submit(_run_with_thread_name, threadName, main_function)
         
         @wraps(func)
         async def wrapper_async(*args, **kwargs):
@@ -261,3 +463,17 @@ def run_threaded(
     
     return top_level_wrapper
 
+
+
+def shutdown_run_threaded(wait: bool = True):
+    """ 
+    Shuts down the shared thread pool of `run_threaded` (used for non-daemon functions)
+    - `wait`: If `True`, waits for the running & pending functions to complete
+    - A new pool is created, if `run_threaded` functions are called again
+    """
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
@@ -17,3 +17,17 @@ class IgnoreError(Exception):
         - By logging/printing to console
         """
         super().__init__(*args)
+
+
+
+
+class RetryCancelled(Exception):
+    """ Raised by `retry_support` decorated function, if its retries are cancelled while waiting
+    - i.e when `cancel_event` of the decorated function is set
+    """
+    
+    def __init__(self, *args: object) -> None:
+        """ Raised by `retry_support` decorated function, if its retries are cancelled while waiting
+        - i.e when `cancel_event` of the decorated function is set
+        """
+        super().__init__(*args)
@@ -0,0 +1,28 @@
+""" Tests of `generalpy.database` (run: `python -m unittest discover tests`, with `src` in `PYTHONPATH`) """
+import unittest
+
+from generalpy.database import DatabaseCollection
+
+
+
+
+class TestDatabaseCollection(unittest.TestCase):
+
+    def test_initial_data_not_copied_when_empty(self):
+        initialData = {}
+        collection = DatabaseCollection('test', initialData, copyInitialData=False)
+        collection.update_data_of_dataType('id1', 'type1', 'value1')
+        self.assertEqual(initialData, {'id1': {'type1': 'value1'}})
+
+    def test_initial_data_copied_by_default(self):
+        initialData = {}
+        collection = DatabaseCollection('test', initialData)
+        collection.update_data_of_dataType('id1', 'type1', 'value1')
+        self.assertEqual(initialData, {})
+        self.assertEqual(collection.get_all_data(), {'id1': {'type1': 'value1'}})
+
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+""" Tests of `generalpy.decorator` (run: `python -m unittest discover tests`, with `src` in `PYTHONPATH`) """
+import os
+import subprocess
+import sys
+import unittest
+
+from generalpy.decorator import retry_support
+from generalpy.exceptions import RetryCancelled
+
+
+
+
+class TestRetrySupport(unittest.TestCase):
+
+    def test_cancel_event(self):
+        @retry_support(num=1, retryWait=60)
+        def failing():
+            failing.cancel_event.set()
+            raise ValueError('failed')
+        with self.assertRaises(RetryCancelled):
+            failing()
+
+    def test_invalid_jitter(self):
+        for jitter in (-0.1, 1.5):
+            with self.assertRaises(ValueError):
+                retry_support(jitter=jitter)
+
+    def test_cancel_event_when_disabled(self):
+        code = (
+            'from generalpy.decorator import retry_support\n'
+            '@retry_support()\n'
+            'def func(): return 1\n'
+            'func.cancel_event.set()\n'
+            'assert func() == 1\n'
+            'assert not hasattr(func.__wrapped__, "cancel_event")\n'
+            'assert retry_support()(len)([1, 2]) == 2\n'
+            'assert retry_support()([].append).cancel_event is not None\n'
+        )
+        env = dict(os.environ, GENERALPY_DECORATORS='off')
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+
+
+if __name__ == '__main__':
+    unittest.main()